@@ -1,8 +1,15 @@
 import argparse
 import csv
+import gzip
+import importlib.util
+import io
 import os
+import sqlite3
+import sys
 from collections import defaultdict
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
 
 import requests
 
@@ -11,11 +18,42 @@ GITLAB_URL = os.environ.get("GITLAB_URL")  # Use environment variable for the Gi
 if not GITLAB_URL:
     GITLAB_URL = "https://gitlab.com"   # Default GitLab URL if not set as environment variable
     print(f"Set GitLab instance URL if self-hosted. export GITLAB_URL=your_gitlab_instance_url")
-PRIVATE_TOKEN = os.environ.get("GITLAB_TOKEN")  # Use environment variable for the token
-if not PRIVATE_TOKEN:
-    raise ValueError("GITLAB_TOKEN environment variable must be set. export GITLAB_TOKEN=your_gitlab_token_here")
+PRIVATE_TOKEN = os.environ.get("GITLAB_TOKEN")  # Use environment variable for the token (not needed for `query`)
 HEADERS = {"Private-Token": PRIVATE_TOKEN}
 
+# Report output formats and the file extension each one is written with
+OUTPUT_FORMATS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'csv.zst': '.csv.zst',
+    'parquet': '.parquet',
+    'arrow': '.arrows',
+}
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+# Optional package each output format needs, checked before any data is fetched
+FORMAT_DEPENDENCIES = {
+    'csv.zst': 'zstandard',
+    'parquet': 'pyarrow',
+    'arrow': 'pyarrow',
+}
+DICTIONARY_COLUMNS = {'Project', 'Branch', 'Author'}  # Low-cardinality columns stored dictionary-encoded
+INTEGER_COLUMNS = {'Commit Count', 'Change Count'}
+ROW_GROUP_SIZE = 100000  # Rows per Parquet row group / Arrow record batch
+
+# Commit listings longer than this many pages are fetched as concurrent time-window slices
+COMMIT_SLICE_PAGES = 10
+MAX_COMMIT_SLICES = 16  # Windows per split, and threads fetching them for one branch
+
+# Local store of fetched commits and file changes, used by the `query` subcommand
+DEFAULT_STORE = 'gitlab_report.db'
+QUERY_GROUP_COLUMNS = {
+    'author': ('Author', 'c.author_name'),
+    'project': ('Project', 'c.project_name'),
+    'branch': ('Branch', 'c.branch_name'),
+    'date': ('Date', 'substr(c.created_utc, 1, 10)'),
+    'file': ('File Path', 'f.new_path'),
+}
+
 
 def get_all_projects():
     print(f"Fetching projects from {GITLAB_URL}")
@@ -53,21 +91,24 @@ def get_project_branches(project_id):
     return branches
 
 
-def get_commits(project_id, branch, start_date, end_date):
-    commits = []
-    page = 1
+def fetch_commits_page(project_id, branch, start_date, end_date, page):
+    return requests.get(
+        f"{GITLAB_URL}/api/v4/projects/{project_id}/repository/commits",
+        params={
+            "ref_name": branch,
+            "since": start_date.isoformat(),
+            "until": end_date.isoformat(),
+            "page": page,
+            "per_page": 100
+        },
+        headers=HEADERS
+    )
+
+
+def get_commits_in_window(project_id, branch, start_date, end_date, page=1, commits=None):
+    commits = commits if commits is not None else []
     while True:
-        response = requests.get(
-            f"{GITLAB_URL}/api/v4/projects/{project_id}/repository/commits",
-            params={
-                "ref_name": branch,
-                "since": start_date.isoformat(),
-                "until": end_date.isoformat(),
-                "page": page,
-                "per_page": 100
-            },
-            headers=HEADERS
-        )
+        response = fetch_commits_page(project_id, branch, start_date, end_date, page)
         if response.status_code == 200:
             batch = response.json()
             if not batch:
@@ -80,6 +121,57 @@ def get_commits(project_id, branch, start_date, end_date):
     return commits
 
 
+def fetch_commit_window(executor, project_id, branch, start_date, end_date):
+    response = fetch_commits_page(project_id, branch, start_date, end_date, 1)
+    if response.status_code != 200:
+        print(f"Error fetching commits for project {project_id}, branch {branch}: {response.status_code}")
+        return [], []
+    first_page = response.json()
+    if len(first_page) < 100:
+        return first_page, []
+
+    # The first page already holds every commit from its oldest committed date up to end_date,
+    # so only start_date..split_date is left (since/until are inclusive, ties are deduplicated later)
+    split_date = min(datetime.fromisoformat(to_utc(commit['committed_date'])) for commit in first_page)
+    # GitLab leaves out X-Total-Pages when the result set is very large
+    total_pages = int(response.headers.get("X-Total-Pages") or 0)
+    if (total_pages and total_pages <= COMMIT_SLICE_PAGES) or not start_date < split_date < end_date:
+        return get_commits_in_window(project_id, branch, start_date, end_date, page=2, commits=first_page), []
+
+    slice_count = MAX_COMMIT_SLICES
+    if total_pages:
+        slice_count = min(MAX_COMMIT_SLICES, -(-(total_pages - 1) // COMMIT_SLICE_PAGES))
+    step = (split_date - start_date) / slice_count
+    # Newest window first, matching the order a single listing returns commits in
+    windows = [(start_date + step * i, split_date if i == slice_count - 1 else start_date + step * (i + 1))
+               for i in reversed(range(slice_count))]
+    print(f"Splitting commits for project {project_id}, branch {branch} from {start_date} to {split_date} "
+          f"into {slice_count} time windows")
+    # Sub-windows go straight onto the shared pool, so a still-crowded window is split again as soon as it is seen
+    futures = [executor.submit(fetch_commit_window, executor, project_id, branch, *window) for window in windows]
+    return first_page, futures
+
+
+def collect_commit_window(future):
+    commits, sub_windows = future.result()
+    yield from commits
+    for sub_window in sub_windows:
+        yield from collect_commit_window(sub_window)
+
+
+def get_commits(project_id, branch, start_date, end_date):
+    commits = []
+    seen = set()
+    with ThreadPoolExecutor(max_workers=MAX_COMMIT_SLICES) as executor:
+        window = executor.submit(fetch_commit_window, executor, project_id, branch, start_date, end_date)
+        for commit in collect_commit_window(window):
+            # Windows share their boundary dates, so a commit there is listed twice
+            if commit['id'] not in seen:
+                seen.add(commit['id'])
+                commits.append(commit)
+    return commits
+
+
 def get_commit_details(project_id, commit_sha):
     response = requests.get(
         f"{GITLAB_URL}/api/v4/projects/{project_id}/repository/commits/{commit_sha}/diff",
@@ -92,12 +184,89 @@ def get_commit_details(project_id, commit_sha):
         return []
 
 
-def generate_report(start_date, end_date, report_types):
-    projects = get_all_projects()
+def open_store(path):
+    store = sqlite3.connect(path)
+    store.executescript("""
+        CREATE TABLE IF NOT EXISTS commits (
+            project_id INTEGER NOT NULL,
+            project_name TEXT NOT NULL,
+            project_url TEXT NOT NULL,
+            branch_name TEXT NOT NULL,
+            id TEXT NOT NULL,
+            short_id TEXT NOT NULL,
+            author_name TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            created_utc TEXT NOT NULL,
+            title TEXT NOT NULL,
+            PRIMARY KEY (project_id, branch_name, id)
+        );
+        CREATE TABLE IF NOT EXISTS file_changes (
+            project_id INTEGER NOT NULL,
+            commit_id TEXT NOT NULL,
+            new_path TEXT NOT NULL,
+            PRIMARY KEY (project_id, commit_id, new_path)
+        );
+        CREATE INDEX IF NOT EXISTS commits_created_utc ON commits (created_utc);
+        CREATE INDEX IF NOT EXISTS commits_author_name ON commits (author_name);
+        CREATE INDEX IF NOT EXISTS commits_project_branch ON commits (project_name, branch_name);
+    """)
+    return store
+
+
+def to_utc(created_at):
+    # Stored alongside the original timestamp so date slices compare correctly across time zones
+    timestamp = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    if timestamp.tzinfo:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%S")
 
+
+def save_commit(store, project_id, commit, file_paths):
+    store.execute(
+        "INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (project_id, commit['project_name'], commit['project_url'], commit['branch_name'], commit['id'],
+         commit['short_id'], commit['author_name'], commit['created_at'], to_utc(commit['created_at']),
+         commit['title'])
+    )
+    store.executemany(
+        "INSERT OR IGNORE INTO file_changes VALUES (?, ?, ?)",
+        [(project_id, commit['id'], path) for path in file_paths]
+    )
+
+
+def new_report_data():
     all_commits = []
     all_authors = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {"count": 0, "project_url": ""})))
     all_files = defaultdict(lambda: {"count": 0, "project_url": ""})
+    return all_commits, all_authors, all_files
+
+
+def add_commit(commit, file_paths, all_commits, all_authors, all_files):
+    project_name = commit['project_name']
+    branch_name = commit['branch_name']
+    project_url = commit['project_url']
+    all_commits.append(commit)
+    all_authors[commit['author_name']][project_name][branch_name]["count"] += 1
+    all_authors[commit['author_name']][project_name][branch_name]["project_url"] = project_url
+    for path in file_paths:
+        key = (project_name, branch_name, path)
+        all_files[key]["count"] += 1
+        all_files[key]["project_url"] = project_url
+
+
+def write_reports(all_commits, all_authors, all_files, date_str, report_types, output_format):
+    if 'commits' in report_types:
+        generate_commits_csv(all_commits, date_str, output_format)
+    if 'authors' in report_types:
+        generate_authors_csv(all_authors, date_str, output_format)
+    if 'files' in report_types:
+        generate_files_csv(all_files, date_str, output_format)
+
+
+def generate_report(start_date, end_date, report_types, output_format='csv', store_path=DEFAULT_STORE):
+    projects = get_all_projects()
+    store = open_store(store_path)
+    all_commits, all_authors, all_files = new_report_data()
 
     for project in projects:
         project_id = project['id']
@@ -113,61 +282,256 @@ def generate_report(start_date, end_date, report_types):
                 commit['project_name'] = project_name
                 commit['branch_name'] = branch_name
                 commit['project_url'] = project_url
-                all_commits.append(commit)
-                all_authors[commit['author_name']][project_name][branch_name]["count"] += 1
-                all_authors[commit['author_name']][project_name][branch_name]["project_url"] = project_url
                 details = get_commit_details(project_id, commit['id'])
-                for file in details:
-                    key = f"{project_name}: {branch_name}: {file['new_path']}"
-                    all_files[key]["count"] += 1
-                    all_files[key]["project_url"] = project_url
+                file_paths = [file['new_path'] for file in details]
+                save_commit(store, project_id, commit, file_paths)
+                add_commit(commit, file_paths, all_commits, all_authors, all_files)
+            store.commit()
 
+    store.close()
     date_str = start_date.strftime("%Y-%m-%d")
-    if 'commits' in report_types:
-        generate_commits_csv(all_commits, date_str)
-    if 'authors' in report_types:
-        generate_authors_csv(all_authors, date_str)
-    if 'files' in report_types:
-        generate_files_csv(all_files, date_str)
+    write_reports(all_commits, all_authors, all_files, date_str, report_types, output_format)
 
     return f"Report generated for {len(projects)} projects from {start_date.date()} to {end_date.date()}"
 
 
-def generate_commits_csv(commits, date_str):
-    filename = f'all_commits_report_{date_str}.csv'
-    with open(filename, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Project', 'Branch', 'Commit ID', 'Author', 'Date', 'Message', 'Repository Link'])
-        for commit in commits:
-            writer.writerow([
-                commit['project_name'],
-                commit['branch_name'],
-                commit['short_id'],
-                commit['author_name'],
-                commit['created_at'],
-                commit['title'],
-                commit['project_url']
-            ])
-
-
-def generate_authors_csv(authors, date_str):
-    filename = f'all_authors_report_{date_str}.csv'
-    with open(filename, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Author', 'Project', 'Branch', 'Commit Count', 'Date', 'Repository Link'])
-        for author, projects in authors.items():
-            for project, branches in projects.items():
-                for branch, data in branches.items():
-                    writer.writerow([author, project, branch, data["count"], date_str, data["project_url"]])
-
-
-def generate_files_csv(files_changed, date_str):
-    filename = f'all_files_report_{date_str}.csv'
-    with open(filename, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Project: Branch: File Path', 'Change Count', 'Date', 'Repository Link'])
-        for file, data in sorted(files_changed.items(), key=lambda x: x[1]["count"], reverse=True):
-            writer.writerow([file, data["count"], date_str, data["project_url"]])
+def generate_commits_csv(commits, date_str, output_format='csv'):
+    header = ['Project', 'Branch', 'Commit ID', 'Author', 'Date', 'Message', 'Repository Link']
+    rows = ([
+        commit['project_name'],
+        commit['branch_name'],
+        commit['short_id'],
+        commit['author_name'],
+        commit['created_at'],
+        commit['title'],
+        commit['project_url']
+    ] for commit in commits)
+    write_report(f'all_commits_report_{date_str}', header, rows, output_format)
+
+
+def generate_authors_csv(authors, date_str, output_format='csv'):
+    header = ['Author', 'Project', 'Branch', 'Commit Count', 'Date', 'Repository Link']
+    rows = ([author, project, branch, data["count"], date_str, data["project_url"]]
+            for author, projects in authors.items()
+            for project, branches in projects.items()
+            for branch, data in branches.items())
+    write_report(f'all_authors_report_{date_str}', header, rows, output_format)
+
+
+def generate_files_csv(files_changed, date_str, output_format='csv'):
+    ranked = sorted(files_changed.items(), key=lambda x: x[1]["count"], reverse=True)
+    if output_format in COLUMNAR_FORMATS:
+        # Separate columns so Project and Branch can be dictionary-encoded
+        header = ['Project', 'Branch', 'File Path', 'Change Count', 'Date', 'Repository Link']
+        rows = ([project, branch, path, data["count"], date_str, data["project_url"]]
+                for (project, branch, path), data in ranked)
+    else:
+        header = ['Project: Branch: File Path', 'Change Count', 'Date', 'Repository Link']
+        rows = ([f"{project}: {branch}: {path}", data["count"], date_str, data["project_url"]]
+                for (project, branch, path), data in ranked)
+    write_report(f'all_files_report_{date_str}', header, rows, output_format)
+
+
+def generate_project_authors_csv(commits, start_str, end_str, output_format='csv'):
+    # Same layout as all-projects-report-without-branch-csv-format.py: commits counted once across branches
+    project_authors = defaultdict(lambda: defaultdict(lambda: {"commit_ids": set(), "dates": set(), "project_url": ""}))
+    for commit in commits:
+        data = project_authors[commit['author_name']][commit['project_name']]
+        data["commit_ids"].add(commit['id'])
+        data["dates"].add(commit['created_at'][:10])
+        data["project_url"] = commit['project_url']
+
+    header = ['Author', 'Project', 'Commit Count', 'Dates', 'Repository Link']
+    rows = ([author, project, len(data["commit_ids"]), ', '.join(sorted(data["dates"])), data["project_url"]]
+            for author, projects in project_authors.items()
+            for project, data in projects.items())
+    write_report(f'authors_report_{start_str}_{end_str}', header, rows, output_format)
+
+
+def write_report(basename, header, rows, output_format):
+    filename = basename + OUTPUT_FORMATS[output_format]
+    if output_format in COLUMNAR_FORMATS:
+        write_columnar_report(filename, header, rows, output_format)
+    else:
+        with open_text_report(filename, output_format) as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+    return filename
+
+
+def check_format_dependency(parser, output_format):
+    package = FORMAT_DEPENDENCIES.get(output_format)
+    if package and importlib.util.find_spec(package) is None:
+        parser.error(f"{output_format} output requires the {package} package. pip install {package}")
+
+
+def open_text_report(filename, output_format):
+    if output_format == 'csv.gz':
+        return gzip.open(filename, 'wt', newline='', encoding='utf-8')
+    if output_format == 'csv.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("csv.zst output requires the zstandard package. pip install zstandard")
+        raw = open(filename, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), newline='', encoding='utf-8')
+    return open(filename, 'w', newline='', encoding='utf-8')
+
+
+def write_columnar_report(filename, header, rows, output_format):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError(f"{output_format} output requires the pyarrow package. pip install pyarrow")
+
+    def column_type(name):
+        if name in DICTIONARY_COLUMNS:
+            return pa.dictionary(pa.int32(), pa.string())
+        if name in INTEGER_COLUMNS:
+            return pa.int64()
+        return pa.string()
+
+    schema = pa.schema([pa.field(name, column_type(name)) for name in header])
+
+    def to_batch(batch_rows):
+        arrays = []
+        for index, field in enumerate(schema):
+            values = [row[index] for row in batch_rows]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    if output_format == 'parquet':
+        writer = pq.ParquetWriter(filename, schema, compression='zstd')
+    else:
+        # The Arrow IPC stream format (unlike the file format) lets each batch carry its own dictionaries
+        writer = pa.ipc.new_stream(filename, schema)
+
+    def write_batch(batch):
+        if output_format == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]))  # One row group per batch
+        else:
+            writer.write_batch(batch)
+
+    with writer:
+        batch_rows = []
+        for row in rows:
+            batch_rows.append(row)
+            if len(batch_rows) >= ROW_GROUP_SIZE:
+                write_batch(to_batch(batch_rows))
+                batch_rows = []
+        if batch_rows:
+            write_batch(to_batch(batch_rows))
+
+
+def query_filters(args):
+    conditions = []
+    params = []
+    if args.since:
+        conditions.append("c.created_utc >= ?")
+        params.append(args.since.isoformat())
+    if args.until:
+        conditions.append("c.created_utc < ?")
+        params.append((args.until + timedelta(days=1)).isoformat())  # Include the whole --until day
+    for column, values in (('c.project_name', args.projects), ('c.branch_name', args.branches),
+                           ('c.author_name', args.authors)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def query_store(store, args):
+    where, params = query_filters(args)
+    columns = [QUERY_GROUP_COLUMNS[key] for key in args.group_by]
+    needs_files = args.count == 'files' or 'file' in args.group_by
+    join = "JOIN file_changes f ON f.project_id = c.project_id AND f.commit_id = c.id" if needs_files else ""
+    # A commit reachable from several branches is counted once per group, as are its file changes
+    if args.count == 'files':
+        count_name, count_expr = 'Change Count', "COUNT(DISTINCT c.project_id || ':' || c.id || ':' || f.new_path)"
+    else:
+        count_name, count_expr = 'Commit Count', "COUNT(DISTINCT c.project_id || ':' || c.id)"
+    group_exprs = ', '.join(expr for _, expr in columns)
+    cursor = store.execute(
+        f"SELECT {group_exprs}, {count_expr} FROM commits c {join} {where} "
+        f"GROUP BY {group_exprs} ORDER BY {len(columns) + 1} DESC, {group_exprs}",
+        params
+    )
+    writer = csv.writer(sys.stdout)
+    writer.writerow([name for name, _ in columns] + [count_name])
+    writer.writerows(cursor)
+
+
+def regenerate_reports(store, args):
+    where, params = query_filters(args)
+    cursor = store.execute(
+        "SELECT c.rowid, c.project_name, c.project_url, c.branch_name, c.id, c.short_id, c.author_name, c.created_at, "
+        "c.title, f.new_path FROM commits c "
+        "LEFT JOIN file_changes f ON f.project_id = c.project_id AND f.commit_id = c.id "
+        f"{where} ORDER BY c.rowid",
+        params
+    )
+    all_commits, all_authors, all_files = new_report_data()
+    keys = ['rowid', 'project_name', 'project_url', 'branch_name', 'id', 'short_id', 'author_name', 'created_at', 'title']
+    for row, changes in groupby(cursor, key=lambda row: row[:-1]):
+        commit = dict(zip(keys, row))
+        del commit['rowid']
+        file_paths = [change[-1] for change in changes if change[-1] is not None]
+        add_commit(commit, file_paths, all_commits, all_authors, all_files)
+
+    if not all_commits:
+        return f"No commits in {args.store} match the query"
+
+    first_date = store.execute(f"SELECT min(substr(c.created_utc, 1, 10)) FROM commits c {where}", params).fetchone()[0]
+    start_str = args.since.strftime("%Y-%m-%d") if args.since else first_date
+    write_reports(all_commits, all_authors, all_files, start_str, args.reports, args.output_format)
+    if 'project-authors' in args.reports:
+        # Its Dates column holds each commit's local date, so the default file name range does too
+        local_dates = [commit['created_at'][:10] for commit in all_commits]
+        start_str = args.since.strftime("%Y-%m-%d") if args.since else min(local_dates)
+        end_str = args.until.strftime("%Y-%m-%d") if args.until else max(local_dates)
+        generate_project_authors_csv(all_commits, start_str, end_str, args.output_format)
+    return f"Report regenerated from {args.store} for {len(all_commits)} commits"
+
+
+def run_query(argv):
+    parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} query",
+        description="Query previously fetched commits and file changes without contacting GitLab.")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Path of the local store written by report runs")
+    parser.add_argument("--since", type=parse_date, help="Only include commits on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=parse_date, help="Only include commits up to this date (YYYY-MM-DD)")
+    parser.add_argument("--projects", nargs='+', help="Only include these project names")
+    parser.add_argument("--branches", nargs='+', help="Only include these branch names")
+    parser.add_argument("--authors", nargs='+', help="Only include these author names, e.g. the members of a team")
+    parser.add_argument("--group-by", nargs='+', choices=list(QUERY_GROUP_COLUMNS), default=['author'],
+                        help="Columns to group the counts by")
+    parser.add_argument("--count", choices=['commits', 'files'], default='commits',
+                        help="Count distinct commits or file changes per group")
+    parser.add_argument("--reports", nargs='+', choices=['commits', 'authors', 'files', 'project-authors'],
+                        help="Regenerate these report files from the store instead of printing counts. "
+                             "project-authors is the per-project authors report of the without-branch script")
+    parser.add_argument("--format", dest="output_format", choices=list(OUTPUT_FORMATS), default='csv',
+                        help="Output format of regenerated reports")
+    args = parser.parse_args(argv)
+    if args.reports:
+        check_format_dependency(parser, args.output_format)
+
+    if not os.path.exists(args.store):
+        raise SystemExit(f"Error: store {args.store} not found. Run a report first to populate it.")
+    store = sqlite3.connect(args.store)
+    try:
+        if args.reports:
+            print(regenerate_reports(store, args))
+        else:
+            query_store(store, args)
+    finally:
+        store.close()
 
 
 def parse_date(date_str):
@@ -178,16 +542,30 @@ def parse_date(date_str):
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Generate GitLab commit report for a specified date range.")
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        run_query(sys.argv[2:])
+        sys.exit()
+
+    parser = argparse.ArgumentParser(
+        description="Generate GitLab commit report for a specified date range.",
+        epilog=f"To query previously fetched data without contacting GitLab, see: "
+               f"{os.path.basename(sys.argv[0])} query --help")
     parser.add_argument("start_date", type=parse_date, help="Start date in YYYY-MM-DD format")
     parser.add_argument("end_date", type=parse_date, help="End date in YYYY-MM-DD format")
     parser.add_argument("--reports", nargs='+', choices=['commits', 'authors', 'files'],
                         default=['commits', 'authors', 'files'],
                         help="Specify which reports to generate")
+    parser.add_argument("--format", dest="output_format", choices=list(OUTPUT_FORMATS), default='csv',
+                        help="Output format: plain, gzip or zstd-compressed CSV, Parquet, or Arrow IPC stream")
+    parser.add_argument("--store", default=DEFAULT_STORE,
+                        help="Local store the fetched commits are saved to for later `query` runs")
     args = parser.parse_args()
+    check_format_dependency(parser, args.output_format)
 
+    if not PRIVATE_TOKEN:
+        raise ValueError("GITLAB_TOKEN environment variable must be set. export GITLAB_TOKEN=your_gitlab_token_here")
     if args.start_date > args.end_date:
         print("Error: Start date must be before end date.")
     else:
-        result = generate_report(args.start_date, args.end_date, args.reports)
+        result = generate_report(args.start_date, args.end_date, args.reports, args.output_format, args.store)
         print(result)